@@ -3,6 +3,7 @@ imported without a need for MPI."""
 
 import argparse
 import functools
+import os
 import warnings
 
 import fitsio
@@ -51,6 +52,9 @@ def add_io_parser(parser=None):
     ingroup.add_argument(
         "--arms", default=['B', 'R'], choices=['B', 'R', 'Z'], nargs='+',
         help="Arms to read.")
+    ingroup.add_argument(
+        "--num-io-threads", type=int, default=1,
+        help="Number of threads per MPI process to read healpix files.")
 
     outgroup = parser.add_argument_group('Output options')
     outgroup.add_argument(
@@ -202,12 +206,14 @@ def save_deltas(
         spectra_list, outdir, save_by_hpx=False, mpi_rank=None
 ):
     """ Saves given list of spectra as deltas. NO coaddition of arms.
-    Each arm is saved separately. Only valid spectra are saved.
+    Each arm is saved separately. Only valid spectra are saved. Files are not
+    created if there are no valid spectra with forest pixels to save, and any
+    existing file for such a group is removed.
 
     Arguments
     ---------
     spectra_list: list(Spectrum)
-        Continuum fitted spectra objects. All must be valid!
+        Continuum fitted spectra objects. Invalid ones are skipped.
     outdir: str
         Output directory. Does not save if empty of None
     save_by_hpx: bool, default: False
@@ -241,10 +247,20 @@ def save_deltas(
         raise QsonicException("Blinding is not set. Cannot save delta.")
 
     for healpix, hp_specs in zip(unique_pix, split_spectra):
-        results = fitsio.FITS(
-            f"{outdir}/delta-{healpix}.fits", 'rw', clobber=True)
+        # Each file is owned by a single rank. Do not create files that would
+        # not have any delta extensions, but remove stale ones from earlier
+        # runs so they are not mixed with the new outputs.
+        fname = f"{outdir}/delta-{healpix}.fits"
+        hp_specs = [spec for spec in qsonic.spectrum.valid_spectra(hp_specs)
+                    if spec.forestwave]
+        if not hp_specs:
+            if os.path.exists(fname):
+                os.remove(fname)
+            continue
 
-        for spec in qsonic.spectrum.valid_spectra(hp_specs):
+        results = fitsio.FITS(fname, 'rw', clobber=True)
+
+        for spec in hp_specs:
             spec.write(results)
 
         results.close()
@@ -278,15 +294,17 @@ def _read_imagehdu(imhdu, quasar_indices, nwave):
 #     return np.vstack([imhdu[int(idx), :, :] for idx in quasar_indices])
 
 
-def _read_true_continuum(targetids, fspec):
+def _read_true_continuum(targetids, fitsfile, fspec):
     """Read true continuum as dictionary from file.
 
     Arguments
     ---------
     targetids: :external+numpy:py:class:`ndarray <numpy.ndarray>`
         Target IDs.
+    fitsfile: fitsio.FITS
+        Opened truth file.
     fspec: str
-        Filename to open.
+        Filename of the truth file. Used in error messages.
 
     Returns
     ---------
@@ -299,9 +317,8 @@ def _read_true_continuum(targetids, fspec):
     RuntimeError
         If number of quasars in TRUE_CONT does not match the input.
     """
-    with fitsio.FITS(fspec) as fitsfile:
-        hdr = fitsfile['TRUE_CONT'].read_header()
-        true_continua = fitsfile['TRUE_CONT'].read()
+    hdr = fitsfile['TRUE_CONT'].read_header()
+    true_continua = fitsfile['TRUE_CONT'].read()
     w1 = hdr['WMIN']
     w2 = hdr['WMAX']
     dw = hdr['DWAVE']
@@ -603,17 +620,21 @@ def read_onehealpix_file_mock(
     if idx_cat.size != catalog_hpx.size:
         catalog_hpx = catalog_hpx[idx_cat]
 
-    fspec = f"{input_dir}/{pixnum//100}/{pixnum}/truth-{nside}-{pixnum}.fits"
-    if read_true_continuum:
-        data['cont'] = _read_true_continuum(catalog_hpx['TARGETID'], fspec)
-
-    if skip_resomat:
+    if skip_resomat and not read_true_continuum:
         return qsonic.spectrum.generate_spectra_list_from_data(
             catalog_hpx, data)
 
+    # Open the truth file once for both true continuum and resolution
+    fspec = f"{input_dir}/{pixnum//100}/{pixnum}/truth-{nside}-{pixnum}.fits"
     with fitsio.FITS(fspec) as fitsfile:
-        for arm in arms_to_keep:
-            data['reso'][arm] = np.array(fitsfile[f'{arm}_RESOLUTION'].read())
+        if read_true_continuum:
+            data['cont'] = _read_true_continuum(
+                catalog_hpx['TARGETID'], fitsfile, fspec)
+
+        if not skip_resomat:
+            for arm in arms_to_keep:
+                data['reso'][arm] = np.array(
+                    fitsfile[f'{arm}_RESOLUTION'].read())
 
     return qsonic.spectrum.generate_spectra_list_from_data(catalog_hpx, data)
 
@@ -7,7 +7,7 @@ from numpy.lib.recfunctions import rename_fields
 import fitsio
 
 from qsonic import QsonicException
-from qsonic.mpi_utils import mpi_fnc_bcast
+from qsonic.mpi_utils import mpi_fnc_bcast, mpi_fnc_bcast_array
 
 
 LIGHT_SPEED = 299792.458
@@ -102,6 +102,67 @@ class SkyMask():
 
             spec.forestivar[arm][w] = 0
 
+    @staticmethod
+    def _in_ranges(wave, mask):
+        """ Returns a boolean array that is True if ``wave`` is in any
+        ``[wave_min, wave_max)`` range of ``mask``. ``wave`` does not need to
+        be sorted.
+
+        Arguments
+        ---------
+        wave: :external+numpy:py:class:`ndarray <numpy.ndarray>`
+            Wavelength array.
+        mask: :external+numpy:py:class:`ndarray <numpy.ndarray>`
+            Named array with 'wave_min' and 'wave_max'.
+
+        Returns
+        -------
+        :external+numpy:py:class:`ndarray <numpy.ndarray>`
+        """
+        wave_min = np.asarray(mask['wave_min'], dtype=float)
+        wave_max = np.asarray(mask['wave_max'], dtype=float)
+        w = wave_min < wave_max
+        wave_min = np.sort(wave_min[w])
+        wave_max = np.sort(wave_max[w])
+
+        # Number of ranges that contain each wavelength
+        return (np.searchsorted(wave_min, wave, side='right')
+                - np.searchsorted(wave_max, wave, side='right')) > 0
+
+    def apply_batch(self, spectra_list):
+        """ Apply the mask to all spectra in ``spectra_list`` by setting
+        **only** ``forestivar`` to zero. Forest wavelengths of all arms are
+        stacked into a single array, so each mask is evaluated once for the
+        whole list. Equivalent to calling :meth:`apply` on each spectrum.
+
+        Arguments
+        ----------
+        spectra_list: list(Spectrum)
+            Spectrum objects to mask.
+        """
+        forests = [(spec, arm, wave_arm) for spec in spectra_list
+                   for arm, wave_arm in spec.forestwave.items()]
+        if not forests:
+            return
+
+        sizes = np.fromiter(
+            (wave_arm.size for _, _, wave_arm in forests), dtype=int,
+            count=len(forests))
+        wave_flat = np.concatenate([wave_arm for _, _, wave_arm in forests])
+        z_flat = np.repeat(
+            np.fromiter((spec.z_qso for spec, _, _ in forests), dtype=float,
+                        count=len(forests)),
+            sizes)
+
+        w = SkyMask._in_ranges(wave_flat, self.mask_obs_frame)
+        w |= SkyMask._in_ranges(
+            wave_flat / (1.0 + z_flat), self.mask_rest_frame)
+
+        for (spec, arm, _), w_arm in zip(
+                forests, np.split(w, np.cumsum(sizes)[:-1])
+        ):
+            spec.forestivar[arm][w_arm] = 0
+
 
 class BALMask():
     """ BAL masking object.
@@ -194,6 +255,20 @@ class BALMask():
 
             spec.forestivar[arm][w] = 0
 
+    @staticmethod
+    def apply_batch(spectra_list):
+        """ Apply the mask to all spectra in ``spectra_list``. Velocities
+        are read from each catalog row, so this calls :meth:`apply` on each
+        spectrum.
+
+        Arguments
+        ----------
+        spectra_list: list(Spectrum)
+            Spectrum objects to mask.
+        """
+        for spec in spectra_list:
+            BALMask.apply(spec)
+
 
 class DLAMask():
     """ DLA masking object.
@@ -206,10 +281,16 @@ class DLAMask():
     fname: str
         FITS filename to read.
     local_targetids: :class:`ndarray <numpy.ndarray>` or None, default: None
-        Remove DLAs if they are present in these TARGETIDs.
+        Remove DLAs if they are not present in these TARGETIDs. Must be
+        sorted.
     comm: None or MPI.COMM_WORLD, default: None
     mpi_rank: int, default: 0
     dla_mask_limit: float, default: 0.8
+
+    Raises
+    ------
+    QsonicException
+        If ``local_targetids`` is not sorted.
     """
     qe = 4.803204e-10
     """float: Charge of electron in statC (cm^3/2 g^1/2 s^-1)."""
@@ -412,14 +493,21 @@ class DLAMask():
             dla_mask_limit=0.8):
         self.dla_mask_limit = dla_mask_limit
 
-        catalog = mpi_fnc_bcast(
+        if (local_targetids is not None
+                and np.any(local_targetids[1:] < local_targetids[:-1])):
+            raise QsonicException("local_targetids must be sorted.")
+
+        catalog = mpi_fnc_bcast_array(
             DLAMask._read_catalog, comm, mpi_rank,
             f"Error loading DLAMask from file {fname}.",
             fname)
 
-        if local_targetids is not None:
-            w = np.isin(catalog['TARGETID'], local_targetids)
-            catalog = catalog[w]
+        if local_targetids is not None and local_targetids.size > 0:
+            idx = np.searchsorted(local_targetids, catalog['TARGETID'])
+            idx[idx == local_targetids.size] = 0
+            catalog = catalog[local_targetids[idx] == catalog['TARGETID']]
+        elif local_targetids is not None:
+            catalog = catalog[:0]
         catalog.sort(order='TARGETID')
 
         # Group DLA catalog into targetids
@@ -435,12 +523,46 @@ class DLAMask():
         spec: Spectrum
             Spectrum object to mask.
         """
-        w = np.nonzero(self.unique_targetids == spec.targetid)[0]
-        if w.size == 0:
+        idx = np.searchsorted(self.unique_targetids, spec.targetid)
+        if (idx == self.unique_targetids.size
+                or self.unique_targetids[idx] != spec.targetid):
+            return
+
+        self._apply_dlas(spec, self.split_catalog[idx])
+
+    def apply_batch(self, spectra_list):
+        """ Apply the mask to all spectra in ``spectra_list``. Spectra with
+        DLAs are found with a single vectorized lookup over all TARGETIDs.
+        Equivalent to calling :meth:`apply` on each spectrum.
+
+        Arguments
+        ----------
+        spectra_list: list(Spectrum)
+            Spectrum objects to mask.
+        """
+        if self.unique_targetids.size == 0 or not spectra_list:
             return
 
-        idx = w[0]
-        spec_dlas = self.split_catalog[idx]
+        targetids = np.fromiter(
+            (spec.targetid for spec in spectra_list), dtype=np.int64,
+            count=len(spectra_list))
+        idx = np.searchsorted(self.unique_targetids, targetids)
+        idx[idx == self.unique_targetids.size] = 0
+        has_dla = self.unique_targetids[idx] == targetids
+
+        for jj in np.nonzero(has_dla)[0]:
+            self._apply_dlas(spectra_list[jj], self.split_catalog[idx[jj]])
+
+    def _apply_dlas(self, spec, spec_dlas):
+        """ Mask and correct ``spec`` for DLAs in ``spec_dlas``.
+
+        Arguments
+        ----------
+        spec: Spectrum
+            Spectrum object to mask.
+        spec_dlas: :external+numpy:py:class:`ndarray <numpy.ndarray>`
+            Named ndarray with 'Z_DLA' and 'NHI'.
+        """
         for arm, wave_arm in spec.forestwave.items():
             transmission = DLAMask.get_all_dlas(wave_arm, spec_dlas)
             # Turn off DLA correction for l_rf > l_lya
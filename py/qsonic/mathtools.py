@@ -13,7 +13,7 @@ def _one_function(x):
     return 1
 
 
-@njit("f8[:](f8[:], f8, f8, f8[:])")
+@njit("f8[:](f8[:], f8, f8, f8[:])", cache=True, nogil=True)
 def _fast_eval_interp1d_lin(x, xp0, dxp, fp):
     """JIT fast linear interpolation."""
     xx = (x - xp0) / dxp
@@ -25,7 +25,7 @@ def _fast_eval_interp1d_lin(x, xp0, dxp, fp):
     return y1 * (1 - d_idx) + y2 * d_idx
 
 
-@njit("f8[:](f8[:], f8, f8, f8[:], f8[:])")
+@njit("f8[:](f8[:], f8, f8, f8[:], f8[:])", cache=True, nogil=True)
 def _fast_eval_interp1d_cubic(x, xp0, dxp, fp, y2p):
     """JIT fast cubic spline."""
     xx = (x - xp0) / dxp
@@ -42,7 +42,7 @@ def _fast_eval_interp1d_cubic(x, xp0, dxp, fp, y2p):
     return r1 + r2
 
 
-@njit("f8[:](f8[:], f8)")
+@njit("f8[:](f8[:], f8)", cache=True, nogil=True)
 def _spline_cubic(fp, dxp):
     """ Constructs the second derivative array.
 
@@ -80,7 +80,7 @@ def _spline_cubic(fp, dxp):
     return y2p
 
 
-@njit("f8[:](f8[:], f8[:])")
+@njit("f8[:](f8[:], f8[:])", cache=True, nogil=True)
 def mypoly1d(coef, x):
     """ My simple power series polynomial calculator.
 
@@ -102,7 +102,8 @@ def mypoly1d(coef, x):
     return results
 
 
-@njit("f8[:, :, :](f8[:], f8[:], f8[:, :, :])")
+@njit("f8[:, :, :](f8[:], f8[:], f8[:, :, :])",
+      cache=True, nogil=True)
 def block_covariance_of_square(mean, var, cov):
     """ Return the block covariance of x^2, i.e.
     :math:`<x_i^2 x_j^2> - <x_i^2><x_j^2>`. Compatible with ``blockdim``
@@ -224,6 +225,112 @@ def get_smooth_ivar(ivar, sigma_pix=20, esigma=3.5):
     return ivar2
 
 
+@njit("f8[:](f8[:], i8[:], f8[:], f8)", cache=True, nogil=True)
+def _smooth_ivar_batch(flat_ivar, offsets, kernel, esigma):
+    """JIT smoothing of concatenated ivar arrays. Same steps as
+    :func:`get_smooth_ivar`, but the Gaussian is applied by direct convolution
+    with ``kernel`` and edge padding."""
+    result = np.zeros_like(flat_ivar)
+    hw = kernel.size // 2
+
+    for ii in range(offsets.size - 1):
+        i1, i2 = offsets[ii], offsets[ii + 1]
+        ivar = flat_ivar[i1:i2]
+        nsize = ivar.size
+        w1 = ivar > 0
+        if not np.any(w1):
+            continue
+
+        error = np.empty(nsize)
+        error[w1] = 1 / np.sqrt(ivar[w1])
+        median_err = np.median(error[w1])
+        error[~w1] = median_err
+
+        # Isolate high noise pixels
+        mad = np.median(np.abs(error[w1] - median_err)) * 1.4826
+        w2 = (error - median_err) > esigma * mad
+        err_rep = np.where(w2, median_err, error)
+
+        for jj in range(nsize):
+            if not w1[jj]:
+                continue
+            # Restore values of bad pixels
+            if w2[jj]:
+                result[i1 + jj] = 1 / error[jj]**2
+                continue
+
+            err_sm = 0.
+            for kk in range(kernel.size):
+                idx = min(max(jj + kk - hw, 0), nsize - 1)
+                err_sm += kernel[kk] * err_rep[idx]
+            result[i1 + jj] = 1 / err_sm**2
+
+    return result
+
+
+def get_smooth_ivar_batch(ivar_list, sigma_pix=20, esigma=3.5):
+    """ Smooth a list of ``ivar`` arrays in a single JIT call. See
+    :func:`get_smooth_ivar` for the algorithm.
+
+    Arrays are concatenated into a flat buffer with offsets, so that the
+    Python overhead is paid once for all arrays. The convolution kernel
+    reproduces the Fourier space filter of :func:`fft_gaussian_smooth`, which
+    is a Gaussian with ``sigma_pix / (2 pi)`` pixels in real space. It is
+    truncated at 10 real-space sigmas, and never beyond the ``3 * sigma_pix``
+    padding in :func:`fft_gaussian_smooth`. If the filter is not negligible at
+    the Nyquist frequency (small ``sigma_pix``), real-space kernel is not a
+    Gaussian and this falls back to :func:`get_smooth_ivar` for each array.
+
+    Arguments
+    ---------
+    ivar_list: list(:external+numpy:py:class:`ndarray <numpy.ndarray>`)
+        Inverse variance arrays.
+    sigma_pix: float, default: 20
+        Smoothing Gaussian sigma in terms of number of pixels.
+    esigma: float, default: 3.5
+        Sigma to identify outliers via MAD.
+
+    Returns
+    ---------
+    ivar2_list: list(:external+numpy:py:class:`ndarray <numpy.ndarray>`)
+        Smoothed ivar values. Outliers and masked values are put back in.
+        These are views into a single flat array.
+    """
+    if not ivar_list:
+        return []
+
+    if np.exp(-sigma_pix**2 / 8) > 1e-10:
+        return [get_smooth_ivar(ivar, sigma_pix, esigma) for ivar in ivar_list]
+
+    offsets = np.zeros(len(ivar_list) + 1, dtype=np.int64)
+    np.cumsum([ivar.size for ivar in ivar_list], out=offsets[1:])
+    flat_ivar = np.concatenate(ivar_list, dtype=np.float64)
+
+    # Real-space sigma is sigma_pix / (2 pi). Truncate at 10 sigma, which is
+    # well below round-off, but not beyond the FFT padding.
+    pad_size = max(1, int(3 * sigma_pix))
+    half_width = min(pad_size, int(np.ceil(10 * sigma_pix / (2 * np.pi))))
+    x = np.arange(-half_width, half_width + 1) * (2 * np.pi / sigma_pix)
+    kernel = np.exp(-x**2 / 2)
+    kernel /= kernel.sum()
+
+    flat_ivar = _smooth_ivar_batch(flat_ivar, offsets, kernel, float(esigma))
+
+    return np.split(flat_ivar, offsets[1:-1])
+
+
+def _tabulate(interp, x0, dx, nsize):
+    """ Tabulate ``interp`` on an equally spaced grid of ``nsize`` points
+    starting at ``x0`` with spacing ``dx``. Shared by the interpolators'
+    ``tabulate`` methods.
+
+    Returns
+    -------
+    FastLinear1DInterp
+    """
+    return FastLinear1DInterp(x0, dx, interp(x0 + dx * np.arange(nsize)))
+
+
 class FastLinear1DInterp():
     """Fast interpolator class for equally spaced data. Out of domain points
     are linearly extrapolated without producing any warnings or errors.
@@ -269,6 +376,25 @@ class FastLinear1DInterp():
 
         self.ep = ep
 
+    def tabulate(self, x0, dx, nsize):
+        """ Tabulate on a new equally spaced grid.
+
+        Arguments
+        ---------
+        x0: float
+            Initial x point of the new grid.
+        dx: float
+            Spacing of the new grid.
+        nsize: int
+            Number of points in the new grid.
+
+        Returns
+        -------
+        FastLinear1DInterp
+            Exact at the new grid points.
+        """
+        return _tabulate(self, x0, dx, nsize)
+
 
 class FastCubic1DInterp():
     """ Fast cubic spline for equally spaced data. Out of domain points
@@ -314,6 +440,26 @@ class FastCubic1DInterp():
 
         self._y2p = _spline_cubic(fp, self.dxp)
 
+    def tabulate(self, x0, dx, nsize):
+        """ Tabulate on a new equally spaced grid. Evaluating the returned
+        linear interpolator is cheaper than the cubic spline.
+
+        Arguments
+        ---------
+        x0: float
+            Initial x point of the new grid.
+        dx: float
+            Spacing of the new grid.
+        nsize: int
+            Number of points in the new grid.
+
+        Returns
+        -------
+        FastLinear1DInterp
+            Exact at the new grid points.
+        """
+        return _tabulate(self, x0, dx, nsize)
+
 
 class SubsampleCov():
     """Utility class to store all subsamples with weights and calculate
@@ -435,9 +581,31 @@ class SubsampleCov():
         inplace: BufSpec
             MPI.IN_PLACE
         """
+        for request in self.iallreduce(comm, inplace):
+            request.Wait()
 
-        comm.Allreduce(inplace, self.all_measurements)
-        comm.Allreduce(inplace, self.all_weights)
+    def iallreduce(self, comm, inplace):
+        """Starts summing statistics from all MPI process without blocking.
+        Statistics must not be used until all returned requests complete.
+
+        .. note::
+
+            Call this with ``inplace=MPI.IN_PLACE``.
+
+        Arguments
+        ---------
+        comm: MPI.COMM_WORLD
+            MPI comm object for Iallreduce
+        inplace: BufSpec
+            MPI.IN_PLACE
+
+        Returns
+        -------
+        requests: list(MPI.Request)
+            Requests to wait on.
+        """
+        return [comm.Iallreduce(inplace, self.all_measurements),
+                comm.Iallreduce(inplace, self.all_weights)]
 
     def _normalize(self):
         self.all_measurements /= self.all_weights + np.finfo(float).eps
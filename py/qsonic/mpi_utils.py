@@ -1,4 +1,6 @@
 import logging
+import os
+import traceback
 
 import fitsio
 import numpy as np
@@ -17,8 +19,9 @@ def mpi_parse(
 
     Arguments
     ---------
-    parser: argparse.ArgumentParser
-        Parser to be used.
+    parser: argparse.ArgumentParser or None
+        Parser to be used. Only accessed on the master node, so other ranks
+        can pass None.
     comm: MPI.COMM_WORLD
         MPI comm object for bcast
     mpi_rank: int
@@ -107,6 +110,107 @@ def mpi_fnc_bcast(fnc, comm=None, mpi_rank=0, err_msg="", *args, **kwargs):
     return result
 
 
+def mpi_fnc_bcast_array(
+        fnc, comm=None, mpi_rank=0, err_msg="", *args, **kwargs
+):
+    """ Wrapper function to run function on master then broadcast the
+    resulting array as raw bytes. Return value of ``fnc`` must be a numpy
+    array (structured arrays are allowed) without object fields.
+
+    Only dtype and shape are pickled. The data itself is sent with
+    ``comm.Bcast`` into a preallocated buffer, which avoids pickling large
+    catalogs. See :func:`mpi_fnc_bcast` for an example.
+
+    Arguments
+    ---------
+    fnc: callable
+        Function to evaluate. Must return
+        :external+numpy:py:class:`ndarray <numpy.ndarray>`.
+    comm: MPI.COMM_WORLD or None, default: None
+        MPI comm object for bcast
+    mpi_rank: int, default: 0
+        Rank of the MPI process.
+    err_msg: str, default: ''
+        Error message to use raising QsonicException.
+    *args:
+        Arguments such as ``fnc(3, 4)``.
+    **kwargs:
+        Keyword arguments such as ``fnc(dtype=int)``
+
+    Returns
+    -------
+    result: :external+numpy:py:class:`ndarray <numpy.ndarray>`
+        Function ``fnc(*args, **kwargs)``.
+
+    Raises
+    ------
+    QsonicException
+        If any error occur while doing ``fnc``.
+    """
+    result = _INVALID_VALUE
+    if (mpi_rank == 0 or comm is None):
+        try:
+            result = np.ascontiguousarray(fnc(*args, **kwargs))
+            if result.dtype.hasobject:
+                raise ValueError("Cannot broadcast object arrays.")
+        except Exception as e:
+            logging.exception(e)
+            logging.error(f"Error in {fnc.__module__}.{fnc.__name__}.")
+            result = _INVALID_VALUE
+
+    if comm is None:
+        if result is _INVALID_VALUE:
+            raise QsonicException(err_msg)
+        return result
+
+    if mpi_rank == 0 and result is not _INVALID_VALUE:
+        meta = (result.dtype, result.shape)
+    else:
+        meta = _INVALID_VALUE
+
+    meta = comm.bcast(meta)
+    if meta is _INVALID_VALUE:
+        raise QsonicException(err_msg)
+
+    if mpi_rank != 0:
+        result = np.empty(meta[1], dtype=meta[0])
+
+    # Bcast raw bytes to skip pickling
+    comm.Bcast(result.reshape(-1).view(np.uint8))
+
+    return result
+
+
+def write_crash_log(outdir, mpi_rank):
+    """ Write the traceback of the exception being handled to
+    ``outdir/crash.{mpi_rank}.log``. Call only inside an ``except`` block.
+
+    Arguments
+    ---------
+    outdir: str or None
+        Output directory. Nothing is written if None or empty.
+    mpi_rank: int
+        Rank of the MPI process.
+
+    Returns
+    -------
+    fname: str or None
+        Filename of the crash log. None if it could not be written.
+    """
+    if not outdir:
+        return None
+
+    fname = os.path.join(outdir, f"crash.{mpi_rank}.log")
+    try:
+        os.makedirs(outdir, exist_ok=True)
+        with open(fname, 'w') as file_crash:
+            file_crash.write(traceback.format_exc())
+    except OSError:
+        return None
+
+    return fname
+
+
 def balance_load(split_catalog, mpi_size):
     """Load balancing function. The return value can be scattered.
 
@@ -385,8 +385,8 @@ class PiccaContinuumFitter():
             a0 = 0
             n0 = 1e-6
             for arm, ivar_arm in spec.forestivar_sm.items():
-                a0 += np.dot(spec.forestflux[arm], ivar_arm)
-                n0 += np.sum(ivar_arm)
+                a0 += np.dot(spec.forestflux[arm], ivar_arm.astype(np.float64))
+                n0 += np.sum(ivar_arm, dtype=np.float64)
 
             return a0 / n0
 
@@ -431,20 +431,20 @@ class PiccaContinuumFitter():
         QsonicException
             If there are no valid fits.
         """
-        num_valid_fits = 0
-        num_invalid_fits = 0
+        # Number of valid and invalid fits
+        num_fits = np.zeros(2, dtype=np.int64)
 
         # For each forest fit continuum
         for spec in spectra_list:
             self.fit_continuum(spec)
 
             if not spec.cont_params['valid']:
-                num_invalid_fits += 1
+                num_fits[1] += 1
             else:
-                num_valid_fits += 1
+                num_fits[0] += 1
 
-        num_valid_fits = self.comm.allreduce(num_valid_fits)
-        num_invalid_fits = self.comm.allreduce(num_invalid_fits)
+        self.comm.Allreduce(MPI.IN_PLACE, num_fits)
+        num_valid_fits, num_invalid_fits = num_fits
         logging.info(f"Number of valid fits: {num_valid_fits}")
         logging.info(f"Number of invalid fits: {num_invalid_fits}")
 
@@ -882,7 +882,7 @@ class PiccaContinuumFitter():
             fts.close()
 
 
-@njit("f8[:, :](i8[:], f8[:], f8[:], i8)")
+@njit("f8[:, :](i8[:], f8[:], f8[:], i8)", cache=True, nogil=True)
 def _fast_weighted_vector_bincount(x, delta, var, minlength):
     xvec = np.zeros((4, minlength), dtype=np.float_)
     y = delta**2
@@ -1135,10 +1135,12 @@ class VarLSSFitter():
             return
 
         if self.comm is not None:
-            self.subsampler.allreduce(self.comm, MPI.IN_PLACE)
-
-            self.comm.Allreduce(MPI.IN_PLACE, self._num_pixels)
-            self.comm.Allreduce(MPI.IN_PLACE, self._num_qso)
+            # Reductions are independent. Post all, then wait.
+            requests = self.subsampler.iallreduce(self.comm, MPI.IN_PLACE)
+            requests.append(
+                self.comm.Iallreduce(MPI.IN_PLACE, self._num_pixels))
+            requests.append(self.comm.Iallreduce(MPI.IN_PLACE, self._num_qso))
+            MPI.Request.Waitall(requests)
 
         self.subsampler.get_mean_n_var()
         if self.use_cov:
@@ -1526,11 +1528,13 @@ class FluxStacker():
     def calculate(self):
         """Calculate stacked flux by allreducing if necessary."""
         if self.comm is not None:
-            self.comm.Allreduce(MPI.IN_PLACE, self._interp.fp)
-            self.comm.Allreduce(MPI.IN_PLACE, self._interp.ep)
-
-            self.comm.Allreduce(MPI.IN_PLACE, self._interp_rf.fp)
-            self.comm.Allreduce(MPI.IN_PLACE, self._interp_rf.ep)
+            # Reductions are independent. Post all, then wait.
+            MPI.Request.Waitall([
+                self.comm.Iallreduce(MPI.IN_PLACE, self._interp.fp),
+                self.comm.Iallreduce(MPI.IN_PLACE, self._interp.ep),
+                self.comm.Iallreduce(MPI.IN_PLACE, self._interp_rf.fp),
+                self.comm.Iallreduce(MPI.IN_PLACE, self._interp_rf.ep)
+            ])
 
         w = self._interp.ep > 0
         self._interp.fp[w] /= self._interp.ep[w]
@@ -1,4 +1,5 @@
 import argparse
+import functools
 import glob
 import logging
 import time
@@ -11,13 +12,16 @@ from qsonic import QsonicException
 import qsonic.catalog
 import qsonic.io
 from qsonic.masks import BALMask
-from qsonic.mpi_utils import mpi_parse, mpi_fnc_bcast, MPISaver
+from qsonic.mpi_utils import (
+    mpi_parse, mpi_fnc_bcast, write_crash_log, MPISaver)
 from qsonic.picca_continuum import VarLSSFitter
 from qsonic.spectrum import add_wave_region_parser
 
 
+@functools.lru_cache(maxsize=None)
 def get_parser(add_help=True):
-    """Constructs the parser needed for the script.
+    """Constructs the parser needed for the script. The parser is built
+    once per ``add_help`` value and cached.
 
     Arguments
     ---------
@@ -203,8 +207,7 @@ def mpi_stack_fluxes(args, comm, deltas_list):
     return waveobs, stacked_flux
 
 
-def mpi_run_all(comm, mpi_rank, mpi_size):
-    args = mpi_parse(get_parser(), comm, mpi_rank)
+def mpi_run_all(args, comm, mpi_rank, mpi_size):
     if mpi_rank == 0:
         os_makedirs(args.outdir, exist_ok=True)
 
@@ -270,12 +273,23 @@ def main():
         datefmt='%Y/%m/%d %I:%M:%S %p',
         level=logging.DEBUG if mpi_rank == 0 else logging.CRITICAL)
 
+    # Parser is only needed on the master node
+    parser = get_parser() if mpi_rank == 0 else None
+    args = mpi_parse(parser, comm, mpi_rank)
+
     try:
-        mpi_run_all(comm, mpi_rank, mpi_size)
+        mpi_run_all(args, comm, mpi_rank, mpi_size)
     except QsonicException as e:
         logging.exception(e)
         exit(1)
     except Exception as e:
-        logging.critical(
-            f"Unexpected error on Rank{mpi_rank}: {e}. Abort.", exc_info=True)
-        comm.Abort()
+        fname = write_crash_log(args.outdir, mpi_rank)
+        if fname:
+            logging.critical(
+                f"Unexpected error on Rank{mpi_rank}: {e}. "
+                f"Traceback is written to {fname}. Abort.")
+        else:
+            logging.critical(
+                f"Unexpected error on Rank{mpi_rank}: {e}. Abort.",
+                exc_info=True)
+        comm.Abort(1)
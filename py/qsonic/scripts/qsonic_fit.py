@@ -1,7 +1,11 @@
 import argparse
+import functools
+import itertools
 import logging
 import time
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from os import makedirs as os_makedirs
 
 import numpy as np
@@ -12,13 +16,15 @@ import qsonic.catalog
 import qsonic.io
 import qsonic.spectrum
 import qsonic.masks
-from qsonic.mpi_utils import mpi_parse
+from qsonic.mpi_utils import mpi_parse, write_crash_log
 from qsonic.picca_continuum import (
     PiccaContinuumFitter, add_picca_continuum_parser)
 
 
+@functools.lru_cache(maxsize=None)
 def get_parser(add_help=True):
-    """Constructs the parser needed for the script.
+    """Constructs the parser needed for the script. The parser is built
+    once per ``add_help`` value and cached.
 
     Arguments
     ---------
@@ -84,6 +90,40 @@ def args_logic_fnc_qsonic_fit(args):
     return not any(_[0] for _ in condition_msg)
 
 
+def _iter_read_local_queue(reader_fnc, local_queue, num_io_threads=1):
+    """ Yields ``reader_fnc(catalog)`` for each catalog in ``local_queue`` in
+    order. If ``num_io_threads > 1``, reading is done by a thread pool with up
+    to ``num_io_threads`` healpixels read ahead of the consumer, which
+    overlaps reading with processing of the yielded spectra.
+
+    Arguments
+    ---------
+    reader_fnc: Callable
+        Function from :func:`qsonic.io.get_spectra_reader_function`.
+    local_queue: list(:external+numpy:py:class:`ndarray <numpy.ndarray>`)
+        Catalog for each healpix.
+    num_io_threads: int, default: 1
+        Number of threads to read files. Reads in this thread if 1.
+
+    Yields
+    ------
+    list(Spectrum)
+    """
+    if num_io_threads <= 1:
+        yield from map(reader_fnc, local_queue)
+        return
+
+    with ThreadPoolExecutor(max_workers=num_io_threads) as executor:
+        futures = deque()
+        for catalog_hpx in local_queue:
+            futures.append(executor.submit(reader_fnc, catalog_hpx))
+            if len(futures) > num_io_threads:
+                yield futures.popleft().result()
+
+        while futures:
+            yield futures.popleft().result()
+
+
 def mpi_read_spectra_local_queue(local_queue, args, comm, mpi_rank):
     """ Read local spectra for the MPI rank. Set forest and observed wavelength
     range.
@@ -116,27 +156,39 @@ def mpi_read_spectra_local_queue(local_queue, args, comm, mpi_rank):
 
     spectra_list = []
     # Each process reads its own list
-    for cat in local_queue:
-        local_specs = readerFunction(cat)
-
-        for spec in local_specs:
+    for local_specs in _iter_read_local_queue(
+            readerFunction, local_queue, args.num_io_threads
+    ):
+        # rsnr is set on construction. Drop low SNR spectra before
+        # slicing the forest.
+        rsnrs = np.fromiter(
+            (spec.rsnr for spec in local_specs), dtype=float,
+            count=len(local_specs))
+
+        for spec in itertools.compress(local_specs, rsnrs >= args.min_rsnr):
             spec.set_forest_region(
                 args.wave1, args.wave2, args.forest_w1, args.forest_w2)
+            if not spec.forestwave:
+                continue
+
             spec.remove_nonforest_pixels()
+            spectra_list.append(spec)
 
-        spectra_list.extend([
-            spec for spec in local_specs
-            if spec.forestwave and spec.rsnr >= args.min_rsnr
-        ])
+    # Count spectra without blocking. Rank 0 only needs this for logging.
+    nspec_local = np.array([len(spectra_list)], dtype=np.int64)
+    nspec_all = np.zeros(1, dtype=np.int64) if mpi_rank == 0 else None
+    req = comm.Ireduce(nspec_local, nspec_all, root=0)
 
     if args.coadd_arms == "before":
         logging.info("Coadding arms.")
         for spec in spectra_list:
             spec.coadd_arms_forest()
 
-    nspec_all = comm.reduce(len(spectra_list))
+    req.Wait()
     etime = (time.time() - start_time) / 60  # min
-    logging.info(f"All {nspec_all} spectra are read in {etime:.1f} mins.")
+    if mpi_rank == 0:
+        logging.info(
+            f"All {nspec_all[0]} spectra are read in {etime:.1f} mins.")
 
     return spectra_list
 
@@ -183,7 +235,7 @@ def mpi_read_masks(local_queue, args, comm, mpi_rank):
 
     if args.sky_mask:
         logging.info("Reading sky mask.")
-        skymasker = qsonic.masks.SkyMask(args.sky_mask)
+        skymasker = qsonic.masks.SkyMask(args.sky_mask, comm, mpi_rank)
 
         maskers.append(skymasker)
 
@@ -197,8 +249,15 @@ def mpi_read_masks(local_queue, args, comm, mpi_rank):
     # DLA mask
     if args.dla_mask:
         logging.info("Reading DLA mask.")
-        local_targetids = np.concatenate(
-            [cat['TARGETID'] for cat in local_queue])
+        # Fill a single preallocated array, then sort for DLAMask
+        local_targetids = np.empty(
+            sum(cat.size for cat in local_queue), dtype=np.int64)
+        i1 = 0
+        for cat in local_queue:
+            i2 = i1 + cat.size
+            local_targetids[i1:i2] = cat['TARGETID']
+            i1 = i2
+        local_targetids.sort()
 
         # Read catalog
         dlamasker = qsonic.masks.DLAMask(
@@ -210,7 +269,7 @@ def mpi_read_masks(local_queue, args, comm, mpi_rank):
     return maskers
 
 
-def apply_masks(maskers, spectra_list, mpi_rank=0):
+def apply_masks(maskers, spectra_list, mpi_rank=0, batch_size=1000):
     """ Apply masks in ``maskers`` to the local ``spectra_list``.
 
     See :mod:`qsonic.masks` for
@@ -228,15 +287,22 @@ def apply_masks(maskers, spectra_list, mpi_rank=0):
         Spectrum objects for the local MPI rank.
     mpi_rank: int
         Rank of the MPI process
+    batch_size: int, default: 1000
+        Number of spectra passed to each masker at once. Bounds the memory of
+        the stacked wavelength arrays.
     """
     if not maskers:
         return
 
     start_time = time.time()
     logging.info("Applying masks.")
-    for spec in spectra_list:
+    # Each masker is applied to a batch of spectra at once.
+    for i in range(0, len(spectra_list), batch_size):
+        batch = spectra_list[i:i + batch_size]
         for masker in maskers:
-            masker.apply(spec)
+            masker.apply_batch(batch)
+
+    for spec in spectra_list:
         spec.drop_short_arms()
     etime = (time.time() - start_time) / 60   # min
     logging.info(f"Masks are applied in {etime:.1f} mins.")
@@ -248,8 +314,9 @@ def remove_short_spectra(spectra_list, lya1, lya2, skip_ratio, mpi_rank=0):
 
     logging.info("Removing short spectra.")
     dforest_wave = lya2 - lya1
-    spectra_list = [spec for spec in spectra_list
-                    if spec.is_long(dforest_wave, skip_ratio)]
+    is_long = qsonic.spectrum.is_long_mask(
+        spectra_list, dforest_wave, skip_ratio)
+    spectra_list = list(itertools.compress(spectra_list, is_long))
 
     return spectra_list
 
@@ -274,42 +341,55 @@ def mpi_continuum_fitting(spectra_list, args, comm, mpi_rank):
     valid_spectra = list(qsonic.spectrum.valid_spectra(spectra_list))
 
     # Final noise calibration for additive var_lss.
-    if args.noise_calibration and args.varlss_as_additive_noise:
+    reset_weights = args.noise_calibration and args.varlss_as_additive_noise
+    if reset_weights:
         logging.info("Applying noise calibration (varlss only).")
         ncal = qsonic.calibration.NoiseCalibrator(
             args.noise_calibration, comm, mpi_rank,
             add_varlss=True, no_eta=True)
         ncal.apply(valid_spectra)
 
-        for spec in valid_spectra:
+    coadd_after = args.coadd_arms == "after"
+    if coadd_after:
+        logging.info("Coadding arms.")
+
+    # Tabulate var_lss and eta on the observed wavelength grid. Linear
+    # lookups are exact on pixels and cheaper than splines in the loop.
+    varlss_interp, eta_interp = qcfit.varlss_interp, qcfit.eta_interp
+    if valid_spectra:
+        qsonic.spectrum.Spectrum._set_coadd_wave()
+        obs_wave = qsonic.spectrum.Spectrum._coadd_wave['brz']
+        dwave = qsonic.spectrum.Spectrum._dwave
+        varlss_interp = varlss_interp.tabulate(
+            obs_wave[0], dwave, obs_wave.size)
+        eta_interp = eta_interp.tabulate(obs_wave[0], dwave, obs_wave.size)
+
+    # Reset weights, coadd and do the final cleaning in a single pass.
+    # Cleaning is especially important if not coadding arms. It does not
+    # change the chi2 catalog values.
+    for spec in valid_spectra:
+        if reset_weights:
             spec.set_smooth_forestivar(spec._smoothing_scale)
-            spec.set_forest_weight(qcfit.varlss_interp, qcfit.eta_interp)
+            spec.set_forest_weight(varlss_interp, eta_interp)
 
-    if args.coadd_arms == "after":
-        logging.info("Coadding arms.")
-        for spec in valid_spectra:
-            spec.coadd_arms_forest(qcfit.varlss_interp, qcfit.eta_interp)
+        if coadd_after:
+            spec.coadd_arms_forest(varlss_interp, eta_interp)
             spec.calc_continuum_chi2()
 
+        spec.drop_short_arms(args.forest_w1, args.forest_w2, args.skip)
+
     qcfit.save_contchi2_catalog(spectra_list)
 
     # Keep only valid spectra
     spectra_list = valid_spectra
 
-    # Final cleaning. Especially important if not coadding arms.
-    for spec in spectra_list:
-        spec.drop_short_arms(args.forest_w1, args.forest_w2, args.skip)
-
     etime = (time.time() - start_time) / 60  # min
     logging.info(f"Continuum fitting and tweaking took {etime:.1f} mins.")
 
     return spectra_list
 
 
-def mpi_run_all(comm, mpi_rank, mpi_size):
-    args = mpi_parse(get_parser(), comm, mpi_rank,
-                     args_logic_fnc=args_logic_fnc_qsonic_fit)
-
+def mpi_run_all(args, comm, mpi_rank, mpi_size):
     if mpi_rank == 0 and args.outdir:
         os_makedirs(args.outdir, exist_ok=True)
 
@@ -350,8 +430,8 @@ def mpi_run_all(comm, mpi_rank, mpi_size):
 
     # Create smoothed ivar as intermediate variable
     if args.smoothing_scale > 0:
-        for spec in spectra_list:
-            spec.set_smooth_forestivar(args.smoothing_scale)
+        qsonic.spectrum.set_smooth_forestivar_batch(
+            spectra_list, args.smoothing_scale)
 
     # Continuum fitting
     spectra_list = mpi_continuum_fitting(spectra_list, args, comm, mpi_rank)
@@ -376,15 +456,27 @@ def main():
         datefmt='%Y/%m/%d %I:%M:%S %p',
         level=logging.DEBUG if mpi_rank == 0 else logging.CRITICAL)
 
+    # Parser is only needed on the master node
+    parser = get_parser() if mpi_rank == 0 else None
+    args = mpi_parse(parser, comm, mpi_rank,
+                     args_logic_fnc=args_logic_fnc_qsonic_fit)
+
     try:
-        mpi_run_all(comm, mpi_rank, mpi_size)
+        mpi_run_all(args, comm, mpi_rank, mpi_size)
     except QsonicException as e:
         logging.exception(e)
         exit(1)
     except Exception as e:
-        logging.critical(
-            f"Unexpected error on Rank{mpi_rank}: {e}. Abort.", exc_info=True)
-        comm.Abort()
+        fname = write_crash_log(args.outdir, mpi_rank)
+        if fname:
+            logging.critical(
+                f"Unexpected error on Rank{mpi_rank}: {e}. "
+                f"Traceback is written to {fname}. Abort.")
+        else:
+            logging.critical(
+                f"Unexpected error on Rank{mpi_rank}: {e}. Abort.",
+                exc_info=True)
+        comm.Abort(1)
 
     etime = (time.time() - start_time) / 60  # min
     logging.info(f"Total time spent is {etime:.1f} mins.")
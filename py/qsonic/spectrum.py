@@ -2,7 +2,8 @@ import argparse
 
 import numpy as np
 
-from qsonic.mathtools import _zero_function, _one_function, get_smooth_ivar
+from qsonic.mathtools import (
+    _zero_function, _one_function, get_smooth_ivar, get_smooth_ivar_batch)
 
 
 def add_wave_region_parser(parser=None):
@@ -51,6 +52,73 @@ def valid_spectra(spectra_list):
     return (spec for spec in spectra_list if spec.cont_params['valid'])
 
 
+def _is_long(real_size, z_qso, dforest_wave, skip_ratio):
+    """Condition for :meth:`Spectrum.is_long`. Works on scalars and arrays."""
+    npixels = (1 + z_qso) * dforest_wave / Spectrum._dwave
+    return real_size > skip_ratio * npixels
+
+
+def is_long_mask(spectra_list, dforest_wave, skip_ratio):
+    """ Same as :meth:`Spectrum.is_long`, but evaluates the condition for
+    all spectra at once.
+
+    Arguments
+    ---------
+    spectra_list: list(Spectrum)
+        Spectrum objects to check.
+    dforest_wave: float
+        Length of the forest in the rest-frame in A.
+    skip_ratio: float
+        Minimum ratio that needs to be present and unmasked to keep the
+        spectrum.
+
+    Returns
+    -------
+    :external+numpy:py:class:`ndarray <numpy.ndarray>`
+        Boolean mask. True if the spectrum is long enough.
+    """
+    nspec = len(spectra_list)
+    if nspec == 0:
+        return np.zeros(0, dtype=bool)
+
+    real_sizes = np.fromiter(
+        (spec.get_real_size() for spec in spectra_list), dtype=np.int64,
+        count=nspec)
+    z_qsos = np.fromiter(
+        (spec.z_qso for spec in spectra_list), dtype=np.float64, count=nspec)
+
+    return _is_long(real_sizes, z_qsos, dforest_wave, skip_ratio)
+
+
+def set_smooth_forestivar_batch(spectra_list, smoothing_size=16.):
+    """ Same as :meth:`Spectrum.set_smooth_forestivar`, but smooths all arms
+    of all spectra in a single JIT call using
+    :func:`qsonic.mathtools.get_smooth_ivar_batch`.
+
+    Arguments
+    ---------
+    spectra_list: list(Spectrum)
+        Spectrum objects to smooth.
+    smoothing_size: float, default: 16
+        Gaussian smoothing spread in A.
+    """
+    if smoothing_size <= 0 or not spectra_list:
+        for spec in spectra_list:
+            spec.set_smooth_forestivar(smoothing_size)
+        return
+
+    sigma_pix = smoothing_size / Spectrum._dwave
+    ivar_list = [ivar_arm for spec in spectra_list
+                 for ivar_arm in spec.forestivar.values()]
+    ivar_sm_iter = iter(get_smooth_ivar_batch(ivar_list, sigma_pix))
+
+    for spec in spectra_list:
+        spec._smoothing_scale = smoothing_size
+        spec._forestivar_sm = {
+            arm: next(ivar_sm_iter) for arm in spec.forestivar.keys()}
+        spec._forestweight = spec._forestivar_sm
+
+
 class Spectrum():
     """An object to represent one spectrum.
 
@@ -61,9 +129,10 @@ class Spectrum():
     wave: dict(:external+numpy:py:class:`ndarray <numpy.ndarray>`)
         Dictionary of arrays specifying the wavelength grid. Static variable!
     flux: dict(:external+numpy:py:class:`ndarray <numpy.ndarray>`)
-        Dictionary of arrays specifying the flux.
+        Dictionary of arrays specifying the flux. Stored as float32.
     ivar: dict(:external+numpy:py:class:`ndarray <numpy.ndarray>`)
-        Dictionary of arrays specifying the inverse variance.
+        Dictionary of arrays specifying the inverse variance. Stored as
+        float32.
     mask: dict(:external+numpy:py:class:`ndarray <numpy.ndarray>`)
         Dictionary of arrays specifying the bitmask. Not stored
     reso: dict(:external+numpy:py:class:`ndarray <numpy.ndarray>`)
@@ -98,6 +167,9 @@ class Spectrum():
     """str or None: Blinding. Must be set for certain data."""
     _fits_colnames = ['LAMBDA', 'DELTA', 'IVAR', 'WEIGHT', 'CONT']
     """list(str): Column names to save in delta files."""
+    _dtype = np.float32
+    """type: Storage type for the input flux and ivar arrays. Derived arrays
+    such as smoothed ivar, weights and coadds, and sums are float64."""
 
     @staticmethod
     def _set_wave(wave, check_consistency=False):
@@ -217,8 +289,8 @@ class Spectrum():
         self._smoothing_scale = 0
 
         for arm, wave_arm in self.wave.items():
-            self.flux[arm] = flux[arm][idx].copy()
-            self.ivar[arm] = ivar[arm][idx].copy()
+            self.flux[arm] = flux[arm][idx].astype(Spectrum._dtype)
+            self.ivar[arm] = ivar[arm][idx].astype(Spectrum._dtype)
             w = (mask[arm][idx] != 0) | np.isnan(self.flux[arm])\
                 | np.isnan(self.ivar[arm])
             self.flux[arm][w] = 0
@@ -251,7 +323,7 @@ class Spectrum():
             # Calculate SNR above Lya
             ii1 = np.searchsorted(
                 wave_arm, (1 + self.z_qso) * Spectrum.WAVE_LYA_A)
-            weight = np.sqrt(self.ivar[arm][ii1:])
+            weight = np.sqrt(self.ivar[arm][ii1:], dtype=np.float64)
             self.rsnr += np.dot(self.flux[arm][ii1:], weight)
             rsnr_weight += np.sum(weight > 0)
 
@@ -269,15 +341,17 @@ class Spectrum():
             flux_arm = self.forestflux[arm]
             w = flux_arm > 0
 
-            self.cont_params['x'][0] += np.dot(flux_arm[w], ivar_arm[w])
-            cont_params_weight += np.sum(ivar_arm[w])
+            self.cont_params['x'][0] += np.dot(
+                flux_arm[w], ivar_arm[w].astype(np.float64))
+            cont_params_weight += np.sum(ivar_arm[w], dtype=np.float64)
 
             self.mean_snr[arm] = 0
             armpix = np.sum(ivar_arm > 0)
             if armpix == 0:
                 continue
 
-            self.mean_snr[arm] = np.dot(np.sqrt(ivar_arm), flux_arm) / armpix
+            self.mean_snr[arm] = np.dot(
+                np.sqrt(ivar_arm, dtype=np.float64), flux_arm) / armpix
 
         self.cont_params['x'][0] /= cont_params_weight
 
@@ -409,8 +483,8 @@ class Spectrum():
         -------
         bool
         """
-        npixels = (1 + self.z_qso) * dforest_wave / self.dwave
-        return self.get_real_size() > skip_ratio * npixels
+        return _is_long(
+            self.get_real_size(), self.z_qso, dforest_wave, skip_ratio)
 
     def set_smooth_forestivar(self, smoothing_size=16.):
         """ Set :attr:`forestivar_sm` to smoothed inverse variance. Before this
@@ -644,7 +718,8 @@ class Spectrum():
         self.set_forest_weight(varlss_interp, eta_interp)
 
         mean_snr = np.dot(
-            np.sqrt(coadd_ivar), coadd_flux) / np.sum(coadd_ivar > 0)
+            np.sqrt(coadd_ivar, dtype=np.float64), coadd_flux
+        ) / np.sum(coadd_ivar > 0)
         self.mean_snr = {'brz': mean_snr}
 
     def mean_resolution(self, arm, weight=None):
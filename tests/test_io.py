@@ -18,6 +18,11 @@ class TestIOParsers(object):
         assert (args.input_dir == "indir")
         assert (args.catalog == "incat")
         assert (args.outdir == "outdir")
+        assert (args.num_io_threads == 1)
+
+        text = "--input-dir indir --catalog incat --num-io-threads 4"
+        args = parser.parse_args(text.split(' '))
+        assert (args.num_io_threads == 4)
 
         with pytest.raises(SystemExit):
             text = "--catalog incat -o outdir"
@@ -58,6 +63,17 @@ class TestIOReading(object):
         with pytest.raises(Exception, match=expected_msg):
             qsonic.io.save_deltas([], "outdir", None)
 
+    def test_save_deltas_no_empty_files(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(qsonic.spectrum.Spectrum, "_blinding", "none")
+        qsonic.io.save_deltas([], str(tmp_path), mpi_rank=0)
+        assert (not list(tmp_path.iterdir()))
+
+        # Stale file from an earlier run is removed
+        fname = tmp_path / "delta-0.fits"
+        fitsio.write(fname, np.zeros(5), extname="STALE")
+        qsonic.io.save_deltas([], str(tmp_path), mpi_rank=0)
+        assert (not fname.exists())
+
     def test_read_spectra_onehealpix(self, my_setup_fits):
         cat_by_survey, input_dir, xarms, data = my_setup_fits
 
@@ -87,6 +103,51 @@ class TestIOReading(object):
                 npt.assert_allclose(spec.flux[arm], data['flux'][arm][jj])
                 npt.assert_allclose(spec.ivar[arm], data['ivar'][arm][jj])
 
+    def test_read_onehealpix_file_mock(self, tmp_path, setup_data):
+        cat_by_survey, npix, data = setup_data(5)
+        pixnum = 8258
+        cat_by_survey['HPXPIXEL'] = pixnum
+        cat_by_survey.sort(order='TARGETID')
+        xarms = list(data['wave'].keys())
+
+        d = tmp_path / f"{pixnum//100}" / f"{pixnum}"
+        d.mkdir(parents=True)
+        with fitsio.FITS(d / f"spectra-16-{pixnum}.fits", 'rw') as fts:
+            fts.write(cat_by_survey, extname="FIBERMAP")
+            for arm in xarms:
+                fts.write(data['wave'][arm], extname=f"{arm}_WAVELENGTH")
+                fts.write(data['flux'][arm], extname=f"{arm}_FLUX")
+                fts.write(data['ivar'][arm], extname=f"{arm}_IVAR")
+                fts.write(data['mask'][arm], extname=f"{arm}_MASK")
+
+        true_cont = np.zeros(
+            5, dtype=[('TARGETID', 'i8'), ('TRUE_CONT', 'f4', 10)])
+        true_cont['TARGETID'] = cat_by_survey['TARGETID']
+        true_cont['TRUE_CONT'] = np.arange(5)[:, np.newaxis]
+        reso = np.ones((11, npix))
+        with fitsio.FITS(d / f"truth-16-{pixnum}.fits", 'rw') as fts:
+            fts.write(true_cont, extname="TRUE_CONT",
+                      header={'WMIN': 800., 'WMAX': 810., 'DWAVE': 1.})
+            for arm in xarms:
+                fts.write(reso, extname=f"{arm}_RESOLUTION")
+
+        slist = qsonic.io.read_onehealpix_file_mock(
+            cat_by_survey, str(tmp_path), xarms, False, True)
+
+        assert (len(slist) == cat_by_survey.size)
+        for jj, spec in enumerate(slist):
+            assert (spec.cont_params['true_data_w1'] == 800.)
+            npt.assert_allclose(spec.cont_params['true_data'], jj)
+            for arm in xarms:
+                npt.assert_allclose(spec.reso[arm], reso)
+
+        slist = qsonic.io.read_onehealpix_file_mock(
+            cat_by_survey, str(tmp_path), xarms, True, False)
+        assert (len(slist) == cat_by_survey.size)
+        for spec in slist:
+            assert ('true_data' not in spec.cont_params)
+            assert (not spec.reso)
+
 
 @pytest.fixture()
 def my_setup_fits(tmp_path, setup_data):
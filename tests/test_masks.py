@@ -1,6 +1,8 @@
 import os
 import pytest
 
+import fitsio
+import numpy as np
 import numpy.testing as npt
 
 import qsonic.masks
@@ -37,5 +39,84 @@ def test_skymask(tmp_path, setup_data):
         npt.assert_equal(spec.forestivar[arm][~w], 1)
 
 
+def _get_spectra(setup_data, nspec):
+    cat_by_survey, _, data = setup_data(nspec)
+    cat_by_survey['Z'] += 0.1 * np.arange(nspec)
+    spectra_list = []
+    for jj in range(nspec):
+        spec = Spectrum(
+            cat_by_survey[jj], data['wave'], data['flux'],
+            data['ivar'], data['mask'], data['reso'], jj
+        )
+        spec.set_forest_region(3600., 6000., 1000., 2000.)
+        spectra_list.append(spec)
+
+    return spectra_list
+
+
+def test_skymask_apply_batch(tmp_path, setup_data):
+    fname_skymask = tmp_path / "test_skymask.txt"
+    with open(fname_skymask, 'w') as file_sky:
+        file_sky.write("Ca\t 3700\t 3750\t OBS\n")
+        file_sky.write("RF\t 1142\t 1150\t RF\n")
+        file_sky.write("Ca\t 3740\t 3760\t OBS\n")
+        file_sky.write("Ca\t 4200\t 4150\t OBS\n")
+
+    skymask = qsonic.masks.SkyMask(fname_skymask)
+    os.remove(fname_skymask)
+
+    spectra_list1 = _get_spectra(setup_data, 4)
+    spectra_list2 = _get_spectra(setup_data, 4)
+    for spec in spectra_list1:
+        skymask.apply(spec)
+    skymask.apply_batch(spectra_list2)
+    skymask.apply_batch([])
+
+    for spec1, spec2 in zip(spectra_list1, spectra_list2):
+        for arm in spec1.forestivar:
+            npt.assert_array_equal(
+                spec2.forestivar[arm], spec1.forestivar[arm])
+
+
+def test_dlamask_apply_batch(tmp_path, setup_data):
+    spectra_list1 = _get_spectra(setup_data, 4)
+    spectra_list2 = _get_spectra(setup_data, 4)
+
+    catalog = np.zeros(
+        4, dtype=[('TARGETID', 'i8'), ('Z', 'f8'), ('NHI', 'f8')])
+    catalog['TARGETID'] = [spectra_list1[1].targetid] * 2 + [
+        spectra_list1[3].targetid, 1]
+    catalog['Z'] = [2.05, 1.95, 2.1, 2.1]
+    catalog['NHI'] = 20.5
+    fname_dla = tmp_path / "test_dlas.fits"
+    fitsio.write(fname_dla, catalog, extname="DLACAT")
+
+    local_targetids = np.sort([spec.targetid for spec in spectra_list1[:3]])
+    dlamask = qsonic.masks.DLAMask(fname_dla, local_targetids)
+    npt.assert_array_equal(
+        dlamask.unique_targetids, [spectra_list1[1].targetid])
+    dlamask = qsonic.masks.DLAMask(fname_dla, np.array([], dtype=int))
+    assert (dlamask.unique_targetids.size == 0)
+    with pytest.raises(qsonic.QsonicException):
+        qsonic.masks.DLAMask(fname_dla, local_targetids[::-1])
+
+    dlamask = qsonic.masks.DLAMask(fname_dla)
+    os.remove(fname_dla)
+
+    for spec in spectra_list1:
+        dlamask.apply(spec)
+    dlamask.apply_batch(spectra_list2)
+
+    for jj, (spec1, spec2) in enumerate(zip(spectra_list1, spectra_list2)):
+        for arm in spec1.forestivar:
+            npt.assert_array_equal(
+                spec2.forestivar[arm], spec1.forestivar[arm])
+            npt.assert_array_equal(
+                spec2.forestflux[arm], spec1.forestflux[arm])
+            if jj in [0, 2]:
+                npt.assert_array_equal(spec1.forestivar[arm], 1)
+    assert (np.any(spectra_list1[1].forestivar['B'] == 0))
+
+
 if __name__ == '__main__':
     pytest.main()
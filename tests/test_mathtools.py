@@ -32,6 +32,18 @@ class TestMathtools(object):
 
         npt.assert_allclose(yarr, ytrue)
 
+    def test_tabulate(self):
+        xin, dxp = np.linspace(320., 550., 300, retstep=True)
+        fp = np.power(xin / 100. - 4., 3)
+        xarr = 310. + 0.5 * np.arange(500)
+
+        for cls in [qsonic.mathtools.FastLinear1DInterp,
+                    qsonic.mathtools.FastCubic1DInterp]:
+            fast_interp = cls(xin[0], dxp, fp)
+            tab_interp = fast_interp.tabulate(310., 0.5, 500)
+            assert isinstance(tab_interp, qsonic.mathtools.FastLinear1DInterp)
+            npt.assert_allclose(tab_interp(xarr), fast_interp(xarr))
+
     def test_mypoly1d(self):
         coefs = np.array([5.5, 1.5, 0.7])
         xarr = np.linspace(-2, 2, 100)
@@ -55,6 +67,25 @@ class TestMathtools(object):
         npt.assert_allclose(ivar_sm[idces], 0)
         npt.assert_allclose(ivar_sm, ivar)
 
+    def test_get_smooth_ivar_batch(self):
+        rng = np.random.default_rng(0)
+        ivar_list = []
+        for nsize in [50, 300, 1000]:
+            ivar = rng.uniform(0.5, 2, nsize)
+            ivar[::13] = 0
+            ivar[5] = 1e-3
+            ivar_list.append(ivar)
+
+        for sigma_pix in [20, 5]:
+            ivar_sm_list = qsonic.mathtools.get_smooth_ivar_batch(
+                ivar_list, sigma_pix)
+            assert (len(ivar_sm_list) == len(ivar_list))
+            for ivar, ivar_sm in zip(ivar_list, ivar_sm_list):
+                npt.assert_allclose(
+                    ivar_sm, qsonic.mathtools.get_smooth_ivar(ivar, sigma_pix))
+
+        assert (not qsonic.mathtools.get_smooth_ivar_batch([]))
+
     def test_SubsampleCov_theory(self):
         subsampler = qsonic.mathtools.SubsampleCov((2, 1), 100)
 
@@ -114,6 +145,21 @@ class TestMathtools(object):
         npt.assert_equal(subsampler.all_measurements.shape, (20, 3, 10))
         npt.assert_equal(subsampler.all_weights.shape, (20, 1, 10))
 
+    @pytest.mark.mpi
+    def test_SubsampleCov_iallreduce(self):
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+
+        subsampler = qsonic.mathtools.SubsampleCov((3, 10), 4)
+        subsampler.add_measurement(np.ones((3, 10)), np.ones(10))
+
+        requests = subsampler.iallreduce(comm, MPI.IN_PLACE)
+        MPI.Request.Waitall(requests)
+
+        npt.assert_allclose(subsampler.all_measurements[0], comm.size)
+        npt.assert_allclose(subsampler.all_weights[0], comm.size)
+        npt.assert_allclose(subsampler.all_measurements[1:], 0)
+
 
 if __name__ == '__main__':
     pytest.main()
@@ -1,5 +1,7 @@
 import argparse
+import os
 import pytest
+import tempfile
 from unittest import TestCase
 
 import numpy as np
@@ -31,6 +33,12 @@ class TestMPIUtils(TestCase):
             options = "--catalog incat -o outdir".split(' ')
             qsonic.mpi_utils.mpi_parse(parser, comm, mpi_rank, options)
 
+        # Parser is not needed on other ranks
+        options = "--input-dir indir --catalog incat -o outdir".split(' ')
+        args = qsonic.mpi_utils.mpi_parse(
+            parser if mpi_rank == 0 else None, comm, mpi_rank, options)
+        assert (args.outdir == "outdir")
+
         # Test logic functions
         from qsonic.scripts.qsonic_fit import (
             get_parser, args_logic_fnc_qsonic_fit)
@@ -75,6 +83,43 @@ class TestMPIUtils(TestCase):
         with pytest.raises(QsonicException):
             qsonic.mpi_utils.mpi_fnc_bcast(np.zeros, None, 0, "Error", -5)
 
+    def test_mpi_fnc_bcast_array(self):
+        result = qsonic.mpi_utils.mpi_fnc_bcast_array(
+            np.arange, None, 0, "Error", 10, dtype=float)
+        npt.assert_allclose(result, np.arange(10))
+
+        with pytest.raises(QsonicException):
+            qsonic.mpi_utils.mpi_fnc_bcast_array(
+                np.zeros, None, 0, "Error", -5)
+
+        with pytest.raises(QsonicException):
+            qsonic.mpi_utils.mpi_fnc_bcast_array(
+                np.array, None, 0, "Error", [None, 1])
+
+    @pytest.mark.mpi
+    def test_mpi_fnc_bcast_array_mpi(self):
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+        mpi_rank = comm.Get_rank()
+
+        dtype = np.dtype([('TARGETID', 'i8'), ('Z_DLA', 'f8'), ('NHI', 'f4')])
+
+        def _read():
+            catalog = np.zeros(5, dtype=dtype)
+            catalog['TARGETID'] = np.arange(5)
+            catalog['Z_DLA'] = 2.1
+            catalog['NHI'] = 20.3
+            return catalog
+
+        result = qsonic.mpi_utils.mpi_fnc_bcast_array(
+            _read, comm, mpi_rank, "Error")
+        assert (result.dtype == dtype)
+        npt.assert_array_equal(result, _read())
+
+        with pytest.raises(QsonicException):
+            qsonic.mpi_utils.mpi_fnc_bcast_array(
+                np.zeros, comm, mpi_rank, "Error", -5)
+
     def test_balance_load(self):
         split_catalog = [
             np.ones(3), 2 * np.ones(4), 3 * np.ones(5), 4 * np.ones(1)]
@@ -93,6 +138,21 @@ class TestMPIUtils(TestCase):
         npt.assert_allclose(q0, 3)
         npt.assert_allclose(q1, 2)
 
+    def test_write_crash_log(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outdir = os.path.join(tmpdir, "outdir")
+            try:
+                raise ValueError("Test crash")
+            except ValueError:
+                fname = qsonic.mpi_utils.write_crash_log(outdir, 3)
+                assert (qsonic.mpi_utils.write_crash_log(None, 3) is None)
+
+            assert (fname == os.path.join(outdir, "crash.3.log"))
+            with open(fname) as file_crash:
+                text = file_crash.read()
+            assert ("Traceback" in text)
+            assert ("ValueError: Test crash" in text)
+
 
 if __name__ == '__main__':
     pytest.main()
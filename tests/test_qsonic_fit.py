@@ -1,7 +1,13 @@
 import pytest
 from unittest import TestCase
 
+import fitsio
+import numpy as np
+import numpy.testing as npt
+
+import qsonic.io
 import qsonic.scripts.qsonic_fit
+from qsonic.spectrum import Spectrum
 
 
 class TestQsonicFit(TestCase):
@@ -40,5 +46,67 @@ class TestQsonicFit(TestCase):
         assert x
 
 
+def test_remove_short_spectra(setup_data):
+    nspec = 6
+    cat_by_survey, _, data = setup_data(nspec)
+    cat_by_survey['Z'] = 2.0 + 0.2 * np.arange(nspec)
+    spectra_list = []
+    for jj in range(nspec):
+        spec = Spectrum(
+            cat_by_survey[jj], data['wave'], data['flux'],
+            data['ivar'], data['mask'], data['reso'], jj
+        )
+        spec.set_forest_region(3600., 6000., 1040., 1200.)
+        spectra_list.append(spec)
+
+    expected = [spec for spec in spectra_list if spec.is_long(160., 0.6)]
+    assert (0 < len(expected) < nspec)
+
+    result = qsonic.scripts.qsonic_fit.remove_short_spectra(
+        spectra_list, 1040., 1200., 0.6)
+    assert (result == expected)
+    assert (qsonic.scripts.qsonic_fit.remove_short_spectra(
+        [], 1040., 1200., 0.6) == [])
+
+
+def test_iter_read_local_queue(tmp_path, setup_data):
+    local_queue = []
+    for pixnum in [8258, 8259, 8300, 9001]:
+        cat_by_survey, _, data = setup_data(3)
+        cat_by_survey['HPXPIXEL'] = pixnum
+        cat_by_survey['TARGETID'] += pixnum
+        cat_by_survey.sort(order='TARGETID')
+        d = tmp_path / "main" / "dark" / f"{pixnum//100}" / f"{pixnum}"
+        d.mkdir(parents=True)
+        with fitsio.FITS(d / f"coadd-main-dark-{pixnum}.fits", 'rw') as fts:
+            fts.write(cat_by_survey, extname="FIBERMAP")
+            for arm in data['wave']:
+                fts.write(data['wave'][arm], extname=f"{arm}_WAVELENGTH")
+                fts.write(
+                    data['flux'][arm] * (pixnum % 100 + 1),
+                    extname=f"{arm}_FLUX")
+                fts.write(data['ivar'][arm], extname=f"{arm}_IVAR")
+                fts.write(data['mask'][arm], extname=f"{arm}_MASK")
+        local_queue.append(cat_by_survey)
+
+    reader = qsonic.io.get_spectra_reader_function(
+        str(tmp_path), ['B', 'R'], False, True, False, False)
+    expected = list(qsonic.scripts.qsonic_fit._iter_read_local_queue(
+        reader, local_queue, 1))
+    assert (len(expected) == len(local_queue))
+
+    for nthreads in [2, 3, 8]:
+        result = list(qsonic.scripts.qsonic_fit._iter_read_local_queue(
+            reader, local_queue, nthreads))
+        assert (len(result) == len(expected))
+        for specs1, specs2 in zip(expected, result):
+            assert (len(specs1) == len(specs2))
+            for spec1, spec2 in zip(specs1, specs2):
+                assert (spec1.targetid == spec2.targetid)
+                for arm in spec1.flux:
+                    npt.assert_array_equal(spec1.flux[arm], spec2.flux[arm])
+                    npt.assert_array_equal(spec1.ivar[arm], spec2.ivar[arm])
+
+
 if __name__ == '__main__':
     pytest.main()
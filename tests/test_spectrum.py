@@ -103,6 +103,46 @@ class TestSpectrum(object):
         spec.set_forest_region(3600., 6000., 1120., 1130.)
         assert (not spec.is_long(dforest_wave, skip_ratio))
 
+    def test_is_long_mask(self, setup_data):
+        cat_by_survey, _, data = setup_data(6)
+        cat_by_survey['Z'] = 2.0 + 0.2 * np.arange(6)
+        spectra_list = qsonic.spectrum.generate_spectra_list_from_data(
+            cat_by_survey, data)
+        for spec in spectra_list:
+            spec.set_forest_region(3600., 6000., 1040., 1200.)
+
+        is_long = qsonic.spectrum.is_long_mask(spectra_list, 160., 0.6)
+        expected = [spec.is_long(160., 0.6) for spec in spectra_list]
+        npt.assert_array_equal(is_long, expected)
+        assert (np.any(is_long) and not np.all(is_long))
+        assert (qsonic.spectrum.is_long_mask([], 160., 0.6).size == 0)
+
+    def test_set_smooth_forestivar_batch(self, setup_data):
+        cat_by_survey, _, data = setup_data(3)
+        rng = np.random.default_rng(0)
+        for arm in data['ivar']:
+            data['ivar'][arm] = rng.uniform(0.5, 2, data['ivar'][arm].shape)
+            data['ivar'][arm][:, ::7] = 0
+        spectra_list = qsonic.spectrum.generate_spectra_list_from_data(
+            cat_by_survey, data)
+        for spec in spectra_list:
+            spec.set_forest_region(3600., 6000., 1000., 2000.)
+
+        expected_list = copy.deepcopy(spectra_list)
+        for spec in expected_list:
+            spec.set_smooth_forestivar(16.)
+
+        qsonic.spectrum.set_smooth_forestivar_batch(spectra_list, 16.)
+        for spec, expected in zip(spectra_list, expected_list):
+            assert (spec._smoothing_scale == 16.)
+            assert (spec.forestweight is spec.forestivar_sm)
+            for arm, ivar_sm in expected.forestivar_sm.items():
+                npt.assert_allclose(spec.forestivar_sm[arm], ivar_sm)
+
+        qsonic.spectrum.set_smooth_forestivar_batch(spectra_list, 0)
+        for spec in spectra_list:
+            assert (spec.forestivar_sm is spec.forestivar)
+
     def test_coadd_arms_forest(self, setup_data):
         cat_by_survey, _, data = setup_data(1)
         spectra_list = qsonic.spectrum.generate_spectra_list_from_data(